@@ -14,6 +14,7 @@ from sklearn.utils.validation import _num_samples
 from ctypes import *
 from os import path, curdir
 from sys import platform
+from concurrent.futures import ThreadPoolExecutor
 
 
 dirname = path.dirname(path.abspath(__file__))
@@ -44,6 +45,88 @@ else :
     print ("Please build the library first!")
     exit()
 
+_model_new_c = thundersvm.model_new
+_model_new_c.argtypes = [c_int]
+_model_new_c.restype = c_void_p
+_model_free_c = thundersvm.model_free
+_model_free_c.argtypes = [c_void_p]
+_model_free_c.restype = None
+_dense_model_scikit_c = thundersvm.dense_model_scikit
+_dense_model_scikit_c.argtypes = [
+    c_int, c_int, POINTER(c_float), POINTER(c_float),
+    c_int, c_int, c_int, c_float, c_float,
+    c_float, c_float, c_float, c_float, c_int,
+    c_int, POINTER(c_int), POINTER(c_float),
+    c_int, c_int, c_int, c_int,
+    POINTER(c_int), POINTER(c_int), POINTER(c_int), c_void_p]
+_dense_model_scikit_c.restype = None
+_sparse_model_scikit_c = thundersvm.sparse_model_scikit
+_sparse_model_scikit_c.argtypes = [
+    c_int, POINTER(c_float), POINTER(c_int), POINTER(c_int), POINTER(c_float),
+    c_int, c_int, c_int, c_float, c_float,
+    c_float, c_float, c_float, c_float, c_int,
+    c_int, POINTER(c_int), POINTER(c_float),
+    c_int, c_int, c_int, c_int,
+    POINTER(c_int), POINTER(c_int), POINTER(c_int), c_void_p]
+_sparse_model_scikit_c.restype = None
+_dense_predict_c = thundersvm.dense_predict
+_dense_predict_c.argtypes = [c_int, c_int, POINTER(c_float), c_void_p, POINTER(c_float)]
+_dense_predict_c.restype = c_int
+_sparse_predict_c = thundersvm.sparse_predict
+_sparse_predict_c.argtypes = [c_int, POINTER(c_float), POINTER(c_int), POINTER(c_int),
+                              c_void_p, POINTER(c_float)]
+_sparse_predict_c.restype = c_int
+_dense_decision_c = thundersvm.dense_decision
+_dense_decision_c.argtypes = [c_int, c_int, POINTER(c_float), c_void_p, c_int, POINTER(c_float)]
+_dense_decision_c.restype = None
+_sparse_decision_c = thundersvm.sparse_decision
+_sparse_decision_c.argtypes = [c_int, POINTER(c_float), POINTER(c_int), POINTER(c_int),
+                               c_void_p, c_int, POINTER(c_float)]
+_sparse_decision_c.restype = None
+_n_sv_c = thundersvm.n_sv
+_n_sv_c.argtypes = [c_void_p]
+_n_sv_c.restype = c_int
+# n_sv_nnz is missing from libraries built before it was added
+if hasattr(thundersvm, 'n_sv_nnz'):
+    _n_sv_nnz_c = thundersvm.n_sv_nnz
+    _n_sv_nnz_c.argtypes = [c_void_p]
+    _n_sv_nnz_c.restype = c_int
+else:
+    _n_sv_nnz_c = None
+if hasattr(thundersvm, 'set_n_threads'):
+    _set_n_threads_c = thundersvm.set_n_threads
+    _set_n_threads_c.argtypes = [c_int]
+    _set_n_threads_c.restype = c_int
+else:
+    _set_n_threads_c = None
+_get_sv_c = thundersvm.get_sv
+_get_sv_c.argtypes = [POINTER(c_int), POINTER(c_int), POINTER(c_float), POINTER(c_int), c_void_p]
+_get_sv_c.restype = None
+_get_support_classes_c = thundersvm.get_support_classes
+_get_support_classes_c.argtypes = [POINTER(c_int), c_int, c_void_p]
+_get_support_classes_c.restype = None
+_get_coef_c = thundersvm.get_coef
+_get_coef_c.argtypes = [POINTER(c_float), c_int, c_int, c_void_p]
+_get_coef_c.restype = None
+_get_rho_c = thundersvm.get_rho
+_get_rho_c.argtypes = [POINTER(c_float), c_int, c_void_p]
+_get_rho_c.restype = None
+_get_pro_c = thundersvm.get_pro
+_get_pro_c.argtypes = [c_void_p, POINTER(c_float)]
+_get_pro_c.restype = None
+_get_n_binary_models_c = thundersvm.get_n_binary_models
+_get_n_binary_models_c.argtypes = [c_void_p, POINTER(c_int)]
+_get_n_binary_models_c.restype = None
+_get_n_classes_c = thundersvm.get_n_classes
+_get_n_classes_c.argtypes = [c_void_p, POINTER(c_int)]
+_get_n_classes_c.restype = None
+_save_to_file_scikit_c = thundersvm.save_to_file_scikit
+_save_to_file_scikit_c.argtypes = [c_void_p, c_char_p]
+_save_to_file_scikit_c.restype = None
+_load_from_file_scikit_c = thundersvm.load_from_file_scikit
+_load_from_file_scikit_c.argtypes = [c_void_p, c_char_p]
+_load_from_file_scikit_c.restype = None
+
 SVM_TYPE = ['c_svc', 'nu_svc', 'one_class', 'epsilon_svr', 'nu_svr']
 KERNEL_TYPE = ['linear', 'polynomial', 'rbf', 'sigmoid', 'precomputed']
 
@@ -70,19 +153,18 @@ class SvmModel(ThundersvmBase):
         self.n_jobs = n_jobs
         self.random_state = random_state
         self.max_mem_size = max_mem_size
-        thundersvm.model_new.restype = c_void_p
-        self.model = thundersvm.model_new(SVM_TYPE.index(self._impl))
+        self._predict_buffers = dict()
+        self.model = _model_new_c(SVM_TYPE.index(self._impl))
+        self._fitted = False
 
     def label_validate(self, y):
 
         return column_or_1d(y, warn=True).astype(np.float64)
 
     def fit(self, X, y):
-        if self.model is not None:
-            thundersvm.model_free(c_void_p(self.model))
         sparse = sp.isspmatrix(X)
         self._sparse = sparse and not callable(self.kernel)
-        X, y = check_X_y(X, y, dtype=np.float64, order='C', accept_sparse='csr')
+        X, y = check_X_y(X, y, dtype=[np.float32, np.float64], order='C', accept_sparse='csr')
         y = self.label_validate(y)
 
         solver_type = SVM_TYPE.index(self._impl)
@@ -99,71 +181,88 @@ class SvmModel(ThundersvmBase):
             kernel = KERNEL_TYPE.index(self.kernel)
 
         fit = self._sparse_fit if self._sparse else self._dense_fit
-        self.model = thundersvm.model_new(solver_type)
+        # the handle from __init__ is still empty until it is trained or loaded
+        if self._fitted:
+            _model_free_c(c_void_p(self.model))
+            self.model = _model_new_c(solver_type)
         fit(X, y, solver_type, kernel)
+        self._fitted = True
         if self._train_succeed[0] == -1:
             print ("Training failed!")
             return
-        self.n_sv = thundersvm.n_sv(c_void_p(self.model))
-        csr_row = (c_int * (self.n_sv + 1))()
-        csr_col = (c_int * (self.n_sv * self.n_features))()
-        csr_data = (c_float * (self.n_sv * self.n_features))()
+        self.n_sv = _n_sv_c(c_void_p(self.model))
+        if _n_sv_nnz_c is not None:
+            sv_nnz = _n_sv_nnz_c(c_void_p(self.model))
+        else:
+            sv_nnz = self.n_sv * self.n_features
+        csr_row = np.empty(self.n_sv + 1, dtype=np.int32)
+        csr_col = np.empty(sv_nnz, dtype=np.int32)
+        csr_data = np.empty(sv_nnz, dtype=np.float32)
         data_size = (c_int * 1)()
-        thundersvm.get_sv(csr_row, csr_col, csr_data, data_size, c_void_p(self.model))
-        dual_coef = (c_float * ((self.n_classes - 1) * self.n_sv))()
-        thundersvm.get_coef(dual_coef, self.n_classes, self.n_sv, c_void_p(self.model))
-        
-        self.dual_coef_ = np.array([dual_coef[index] for index in range(0, (self.n_classes - 1) * self.n_sv)]).astype(float)
-        self.dual_coef_ = np.reshape(self.dual_coef_, (self.n_classes - 1, self.n_sv))
+        _get_sv_c(csr_row.ctypes.data_as(POINTER(c_int)), csr_col.ctypes.data_as(POINTER(c_int)),
+                  csr_data.ctypes.data_as(POINTER(c_float)), data_size, c_void_p(self.model))
+        self.dual_coef_ = np.empty((self.n_classes - 1, self.n_sv), dtype=np.float32)
+        _get_coef_c(self.dual_coef_.ctypes.data_as(POINTER(c_float)), self.n_classes, self.n_sv,
+                    c_void_p(self.model))
 
-        rho_size = int(self.n_classes * (self.n_classes - 1) / 2)
+        rho_size = self.n_classes * (self.n_classes - 1) // 2
         self.n_binary_model = rho_size
-        rho = (c_float * rho_size)()
-        thundersvm.get_rho(rho, rho_size, c_void_p(self.model))
-        self.intercept_ = np.array([rho[index] for index in range(0, rho_size)]).astype(float)
-        
-        self.row  = np.array([csr_row[index] for index in range(0, self.n_sv + 1)])
-        self.col  = np.array([csr_col[index] for index in range(0, data_size[0])])
-        self.data = np.array([csr_data[index] for index in range(0, data_size[0])])
+        self.intercept_ = np.empty(rho_size, dtype=np.float32)
+        _get_rho_c(self.intercept_.ctypes.data_as(POINTER(c_float)), rho_size, c_void_p(self.model))
         
-        self.support_vectors_ = sp.csr_matrix((self.data, self.col, self.row))
-        if self._sparse == False:
-            self.support_vectors_ = self.support_vectors_.toarray(order = 'C')
+        self.row  = csr_row
+        self.col  = csr_col[:data_size[0]]
+        self.data = csr_data[:data_size[0]]
+
+        # densified lazily by the support_vectors_ property for dense models
+        self._support_vectors_csr = sp.csr_matrix((self.data, self.col, self.row),
+                                                  shape=(self.n_sv, self.n_features))
+        # get_sv writes each support vector in increasing feature order
+        self._support_vectors_csr.has_sorted_indices = True
+        self._support_vectors_dense = None
+        self._sv_sparse = self._sparse
         n_support_ = (c_int * self.n_classes)()
-        thundersvm.get_support_classes(n_support_, self.n_classes, c_void_p(self.model))
+        _get_support_classes_c(n_support_, self.n_classes, c_void_p(self.model))
         
-        self.n_support_ = np.array([n_support_[index] for index in range(0, self.n_classes)]).astype(int)
+        self.n_support_ = np.frombuffer(n_support_, dtype=np.int32).astype(int)
 
         self.shape_fit_ = X.shape
 
         return self
 
+    @property
+    def support_vectors_(self):
+        if self._sv_sparse:
+            return self._support_vectors_csr
+        if self._support_vectors_dense is None:
+            self._support_vectors_dense = self._support_vectors_csr.toarray(order='C')
+        return self._support_vectors_dense
+
     def _dense_fit(self, X, y, solver_type, kernel):
 
-        X = np.asarray(X, dtype=np.float64, order='C')
+        # the numpy arrays must stay referenced until the C call returns
+        X = np.ascontiguousarray(X, dtype=np.float32)
         samples = X.shape[0]
         features = X.shape[1]
-        X_1d = X.ravel()
-        data = (c_float * X_1d.size)()
-        data[:] = X_1d
+        data = X.ctypes.data_as(POINTER(c_float))
         kernel_type = kernel
-        label = (c_float * y.size)()
-        label[:] = y
+        y = np.ascontiguousarray(y, dtype=np.float32)
+        label = y.ctypes.data_as(POINTER(c_float))
 
         if self.class_weight is None:
             weight_size = 0
             self.class_weight = dict()
         else:
             weight_size = len(self.class_weight)
-        weight_label = (c_int * weight_size)()
-        weight_label[:] = list(self.class_weight.keys())
-        weight = (c_float * weight_size)()
-        weight[:] = list(self.class_weight.values())
+        weight_label_array = np.fromiter(self.class_weight.keys(), dtype=np.int32, count=weight_size)
+        weight_label = weight_label_array.ctypes.data_as(POINTER(c_int))
+        weight_array = np.fromiter(self.class_weight.values(), dtype=np.float32, count=weight_size)
+        weight = weight_array.ctypes.data_as(POINTER(c_float))
 
         n_features = (c_int * 1)()
         n_classes = (c_int * 1)()
         self._train_succeed = (c_int * 1)()
-        thundersvm.dense_model_scikit(
+        _dense_model_scikit_c(
             samples, features, data, label, solver_type,
             kernel_type, self.degree, c_float(self._gamma), c_float(self.coef0),
             c_float(self.C), c_float(self.nu), c_float(self.epsilon), c_float(self.tol),
@@ -177,35 +276,36 @@ class SvmModel(ThundersvmBase):
 
 
     def _sparse_fit(self, X, y, solver_type, kernel):
-        X.data = np.asarray(X.data, dtype=np.float64, order='C')
-        X.sort_indices()
+        if not X.has_sorted_indices:
+            X.sort_indices()
 
         kernel_type = kernel
 
 
-        data = (c_float * X.data.size)()
-        data[:] = X.data
-        indices = (c_int * X.indices.size)()
-        indices[:] = X.indices
-        indptr = (c_int * X.indptr.size)()
-        indptr[:] = X.indptr
-        label = (c_float * y.size)()
-        label[:] = y
+        # the numpy arrays must stay referenced until the C call returns
+        data_array = np.ascontiguousarray(X.data, dtype=np.float32)
+        data = data_array.ctypes.data_as(POINTER(c_float))
+        indices_array = np.ascontiguousarray(X.indices, dtype=np.int32)
+        indices = indices_array.ctypes.data_as(POINTER(c_int))
+        indptr_array = np.ascontiguousarray(X.indptr, dtype=np.int32)
+        indptr = indptr_array.ctypes.data_as(POINTER(c_int))
+        y = np.ascontiguousarray(y, dtype=np.float32)
+        label = y.ctypes.data_as(POINTER(c_float))
 
         if self.class_weight is None:
             weight_size = 0
             self.class_weight = dict()
         else:
             weight_size = len(self.class_weight)
-        weight_label = (c_int * weight_size)()
-        weight_label[:] = list(self.class_weight.keys())
-        weight = (c_float * weight_size)()
-        weight[:] = list(self.class_weight.values())
+        weight_label_array = np.fromiter(self.class_weight.keys(), dtype=np.int32, count=weight_size)
+        weight_label = weight_label_array.ctypes.data_as(POINTER(c_int))
+        weight_array = np.fromiter(self.class_weight.values(), dtype=np.float32, count=weight_size)
+        weight = weight_array.ctypes.data_as(POINTER(c_float))
 
         n_features = (c_int * 1)()
         n_classes = (c_int * 1)()
         self._train_succeed = (c_int * 1)()
-        thundersvm.sparse_model_scikit(
+        _sparse_model_scikit_c(
                 X.shape[0], data, indptr, indices, label, solver_type,
                 kernel_type, self.degree, c_float(self._gamma), c_float(self.coef0),
                 c_float(self.C), c_float(self.nu), c_float(self.epsilon), c_float(self.tol),
@@ -224,10 +324,12 @@ class SvmModel(ThundersvmBase):
         # check_is_fitted(self, 'support_')
         sparse = sp.isspmatrix(X)
         self._sparse = sparse and not callable(self.kernel)
-        X = check_array(X, accept_sparse='csr', dtype=np.float64, order="C")
+        self._predict_impl = self._sparse_predict if self._sparse else self._dense_predict
+        # the predict paths pass X's memory to the library as float*
+        X = check_array(X, accept_sparse='csr', dtype=np.float32, order="C")
         if self._sparse and not sp.isspmatrix(X):
             X = sp.csr_matrix(X)
-        if self._sparse:
+        if self._sparse and not X.has_sorted_indices:
             X.sort_indices()
 
         if sp.issparse(X) and not self._sparse and not callable(self.kernel):
@@ -240,91 +342,126 @@ class SvmModel(ThundersvmBase):
     def predict(self, X):
 
         X = self._validate_for_predict(X)
-        predict = self._sparse_predict if self._sparse else self._dense_predict
-        return predict(X)
+        self._set_n_threads()
+        return self._predict_impl(X)
 
     def predict_proba(self, X):
-        n_classes = (c_int * 1)()
-        thundersvm.get_n_classes(c_void_p(self.model), n_classes)
-        self.n_classes = n_classes[0]
+        if not hasattr(self, 'n_classes'):
+            self._query_n_classes()
         if self.probability == 0:
             print ("Should fit with probability = 1")
             return
         else:
             size = X.shape[0] * self.n_classes
             samples = X.shape[0]
-            self.predict_pro_ptr = (c_float * size)()
+            predict_prob = self._get_predict_buffer('prob', size)
             X = self._validate_for_predict(X)
-            if self._sparse:
-                self._sparse_predict(X)
-            else :
-                self._dense_predict(X)
-            # size = X.shape[0] * self.n_classes
-            # self.predict_pro_ptr = (c_float * size)()
-            # X = np.asarray(X, dtype=np.float64, order='C')
-            #
-            # self.predict_label_ptr = (c_float * X.shape[0])()
-            # samples = X.shape[0]
-            # features = X.shape[1]
-            # X_1d = X.ravel()
-            #
-            # data = (c_float * X_1d.size)()
-            # data[:] = X_1d
-            # thundersvm.dense_predict(
-            #     samples, features, data,
-            #     c_void_p(self.model),
-            #     self.predict_label_ptr)
-            thundersvm.get_pro(c_void_p(self.model),self.predict_pro_ptr)
-            self.predict_prob = np.array([self.predict_pro_ptr[index] for index in range(0, size)])
+            self._set_n_threads()
+            self._predict_impl(X)
+            _get_pro_c(c_void_p(self.model), predict_prob.ctypes.data_as(POINTER(c_float)))
+            self.predict_prob = predict_prob.astype(float)
             self.predict_prob = np.reshape(self.predict_prob, (samples, self.n_classes))
             return self.predict_prob
 
 
 
+    def _set_n_threads(self):
+        # applies to the calling thread only; training sets it too, but another
+        # estimator may have changed it since; -1 uses all cores
+        if _set_n_threads_c is not None:
+            _set_n_threads_c(self.n_jobs)
+
+    def _get_predict_buffer(self, kind, size):
+        # output buffers are kept across calls and grown geometrically
+        buf = self._predict_buffers.get(kind)
+        if buf is None or buf.size < size:
+            if buf is not None:
+                size_alloc = max(size, 2 * buf.size)
+            else:
+                size_alloc = size
+            buf = np.empty(size_alloc, dtype=np.float32)
+            self._predict_buffers[kind] = buf
+        return buf[:size]
+
+    def free_buffers(self):
+        self._predict_buffers = dict()
+
     def _dense_predict(self, X):
 
-        self.predict_label_ptr = (c_float * X.shape[0])()
-        X = np.asarray(X, dtype=np.float64, order='C')
+        predict_label = self._get_predict_buffer('label', X.shape[0])
         samples = X.shape[0]
         features = X.shape[1]
-        X_1d = X.ravel()
-
-        data = (c_float * X_1d.size)()
-        data[:] = X_1d
-        thundersvm.dense_predict(
+        data = X.ctypes.data_as(POINTER(c_float))
+        _dense_predict_c(
             samples, features, data,
             c_void_p(self.model),
-            self.predict_label_ptr)
-        
-        self.predict_label = np.array([self.predict_label_ptr[index] for index in range(0, X.shape[0])])
+            predict_label.ctypes.data_as(POINTER(c_float)))
+
+        self.predict_label = predict_label.astype(float)
         return self.predict_label
 
+    def predict_batches(self, X_iter, batch_size=10000):
+        # each dataset is validated as in predict; its batches are predicted
+        # on a worker thread (ctypes drops the GIL) while the next dataset is
+        # validated, and the results are collected before yielding so that no
+        # library call is in flight while the caller runs
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1, got %r" % batch_size)
+        X_iter = iter(X_iter)
+        end = object()
+        executor = ThreadPoolExecutor(max_workers=1)
+        try:
+            X = next(X_iter, end)
+            if X is not end:
+                X = self._validate_for_predict(X)
+            while X is not end:
+                # the worker must not read self._predict_impl, which the next
+                # validation rebinds
+                if self._sparse:
+                    futures = [executor.submit(self._predict_batch, self._predict_impl, X)]
+                else:
+                    futures = [executor.submit(self._predict_batch, self._predict_impl,
+                                               X[start:start + batch_size])
+                               for start in range(0, X.shape[0], batch_size)]
+                X = next(X_iter, end)
+                if X is not end:
+                    X = self._validate_for_predict(X)
+                yield np.concatenate([future.result() for future in futures])
+        finally:
+            executor.shutdown()
+
+    def _predict_batch(self, predict, X):
+        # the OpenMP thread count is per thread, and the worker thread starts
+        # with the default
+        self._set_n_threads()
+        return predict(X)
+
     def _sparse_predict(self, X):
-        self.predict_label_ptr = (c_float * X.shape[0])()
-        data = (c_float * X.data.size)()
-        data[:] = X.data
-        indices = (c_int * X.indices.size)()
-        indices[:] = X.indices
-        indptr = (c_int * X.indptr.size)()
-        indptr[:] = X.indptr
-        thundersvm.sparse_predict(
+        # the library densifies each prediction batch before the kernel
+        # evaluation, so CSR is only a transport format here
+        predict_label = self._get_predict_buffer('label', X.shape[0])
+        data_array = np.ascontiguousarray(X.data, dtype=np.float32)
+        data = data_array.ctypes.data_as(POINTER(c_float))
+        indices_array = np.ascontiguousarray(X.indices, dtype=np.int32)
+        indices = indices_array.ctypes.data_as(POINTER(c_int))
+        indptr_array = np.ascontiguousarray(X.indptr, dtype=np.int32)
+        indptr = indptr_array.ctypes.data_as(POINTER(c_int))
+        _sparse_predict_c(
             X.shape[0], data, indptr, indices,
             c_void_p(self.model),
-            self.predict_label_ptr)
+            predict_label.ctypes.data_as(POINTER(c_float)))
 
-        predict_label = [self.predict_label_ptr[index] for index in range(0, X.shape[0])]
-        
-        self.predict_label = np.asarray(predict_label)
+        self.predict_label = predict_label.astype(float)
         return self.predict_label
 
     def decision_function(self, X):
         X = self._validate_for_predict(X)
-        n_binary_model = (c_int * 1)()
-        thundersvm.get_n_binary_models(c_void_p(self.model), n_binary_model)
-        self.n_binary_model = n_binary_model[0]
+        if not hasattr(self, 'n_binary_model'):
+            self._query_n_classes()
         if not(self._impl in ['c_svc', 'nu_svc', 'one_class']):
             print ("Not support decision_function!")
             return
+        self._set_n_threads()
         if self._sparse:
             dec_func = self._sparse_decision_function(X)
         else:
@@ -332,46 +469,54 @@ class SvmModel(ThundersvmBase):
         return dec_func
 
     def _dense_decision_function(self, X):
-        X = check_array(X, dtype=np.float64, order="C")
         samples = X.shape[0]
         features = X.shape[1]
-        X_1d = X.ravel()
-
-        data = (c_float * X_1d.size)()
-        data[:] = X_1d
+        data = X.ctypes.data_as(POINTER(c_float))
         dec_size = X.shape[0] * self.n_binary_model
-        dec_value_ptr = (c_float * dec_size)()
-        thundersvm.dense_decision(
-            samples, features, data, c_void_p(self.model), dec_size, dec_value_ptr
+        dec_values = self._get_predict_buffer('dec', dec_size)
+        _dense_decision_c(
+            samples, features, data, c_void_p(self.model), dec_size,
+            dec_values.ctypes.data_as(POINTER(c_float))
         )
-        self.dec_values = np.array([dec_value_ptr[index] for index in range(0, dec_size)]).astype(float)
+        self.dec_values = dec_values.astype(float)
         self.dec_values = np.reshape(self.dec_values, (X.shape[0], self.n_binary_model))
         return self.dec_values
 
 
 
     def _sparse_decision_function(self, X):
-        X.data = np.asarray(X.data, dtype=np.float64, order='C')
-        data = (c_float * X.data.size)()
-        data[:] = X.data
-        indices = (c_int * X.indices.size)()
-        indices[:] = X.indices
-        indptr = (c_int * X.indptr.size)()
-        indptr[:] = X.indptr
+        data_array = np.ascontiguousarray(X.data, dtype=np.float32)
+        data = data_array.ctypes.data_as(POINTER(c_float))
+        indices_array = np.ascontiguousarray(X.indices, dtype=np.int32)
+        indices = indices_array.ctypes.data_as(POINTER(c_int))
+        indptr_array = np.ascontiguousarray(X.indptr, dtype=np.int32)
+        indptr = indptr_array.ctypes.data_as(POINTER(c_int))
         dec_size = X.shape[0] * self.n_binary_model
-        dec_value_ptr = (c_float * dec_size)()
-        thundersvm.sparse_decision(
+        dec_values = self._get_predict_buffer('dec', dec_size)
+        _sparse_decision_c(
             X.shape[0], data, indptr, indices,
-            c_void_p(self.model), dec_size, dec_value_ptr)
-        self.dec_values = np.array([dec_value_ptr[index] for index in range(0, dec_size)])
+            c_void_p(self.model), dec_size,
+            dec_values.ctypes.data_as(POINTER(c_float)))
+        self.dec_values = dec_values.astype(float)
         self.dec_values = np.reshape(self.dec_values, (X.shape[0], self.n_binary_model))
         return self.dec_values
 
     def save_to_file(self, path):
-        thundersvm.save_to_file_scikit(c_void_p(self.model), path.encode('utf-8'))
+        _save_to_file_scikit_c(c_void_p(self.model), path.encode('utf-8'))
 
     def load_from_file(self, path):
-        thundersvm.load_from_file_scikit(c_void_p(self.model), path.encode('utf-8'))
+        _load_from_file_scikit_c(c_void_p(self.model), path.encode('utf-8'))
+        self._fitted = True
+        self._query_n_classes()
+
+    def _query_n_classes(self):
+        # fit caches both values; models loaded from file read them once here
+        n_classes = (c_int * 1)()
+        _get_n_classes_c(c_void_p(self.model), n_classes)
+        self.n_classes = n_classes[0]
+        n_binary_model = (c_int * 1)()
+        _get_n_binary_models_c(c_void_p(self.model), n_binary_model)
+        self.n_binary_model = n_binary_model[0]
 
 
 class SVC(SvmModel, ClassifierMixin):
@@ -34,6 +34,21 @@ extern "C" {
         }
     }
 
+    //applies to the calling thread; returns -1 if n_cores is invalid
+    int set_n_threads(int n_cores){
+        if(n_cores == -1){
+            omp_set_num_threads(omp_get_num_procs());
+        }
+        else if(n_cores <= 0){
+            LOG(ERROR) << "cores number must bigger than 0";
+            return -1;
+        }
+        else{
+            omp_set_num_threads(n_cores);
+        }
+        return 0;
+    }
+
     void sparse_model_scikit(int row_size, float* val, int* row_ptr, int* col_ptr, float* label,
                                   int svm_type, int kernel_type, int degree, float gamma, float coef0,
                                   float cost, float nu, float epsilon, float tol, int probability,
@@ -45,15 +60,7 @@ extern "C" {
             el::Loggers::reconfigureAllLoggers(el::ConfigurationType::Enabled, "true");
         else
             el::Loggers::reconfigureAllLoggers(el::ConfigurationType::Enabled, "false");
-        if(n_cores == -1){
-            omp_set_num_threads(omp_get_num_procs());
-        }
-        else if(n_cores <= 0){
-            LOG(ERROR) << "cores number must bigger than 0";
-        }
-        else{
-            omp_set_num_threads(n_cores);
-        }
+        set_n_threads(n_cores);
 
         DataSet train_dataset;
         train_dataset.load_from_sparse(row_size, val, row_ptr, col_ptr, label);
@@ -143,12 +150,8 @@ extern "C" {
             el::Loggers::reconfigureAllLoggers(el::ConfigurationType::Enabled, "true");
         else
             el::Loggers::reconfigureAllLoggers(el::ConfigurationType::Enabled, "false");
-        if((n_cores <= 0) && (n_cores != -1)){
-            LOG(ERROR) << "cores number must bigger than 0";
+        if(set_n_threads(n_cores) == -1)
             succeed[0] = -1;
-        }
-        else
-            omp_set_num_threads(n_cores);
         DataSet train_dataset;
         train_dataset.load_from_dense(row_size, features, data, label);
 //        SvmModel* model;
@@ -234,6 +237,15 @@ extern "C" {
         return model->total_sv();
     }
 
+    int n_sv_nnz(SvmModel* model){
+        const DataSet::node2d &svs = model->svs();
+        int nnz = 0;
+        for(int i = 0; i < svs.size(); i++){
+            nnz += svs[i].size();
+        }
+        return nnz;
+    }
+
     void set_iter(SvmModel* model, int iter){
         model->set_max_iter(iter);
         return;